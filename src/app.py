@@ -5,10 +5,11 @@ import sys
 import os
 from datetime import datetime
 
-# Import your existing modules
-from ticket_system import TicketSystem
-from support_agent import SupportAgent
-from knowledge_base import KnowledgeBase
+import numpy as np
+import pandas as pd
+
+# Heavy modules (knowledge_base pulls in torch/transformers) are imported
+# lazily inside get_system_components so they load once per process
 import config
 
 # Configure logging
@@ -98,40 +99,78 @@ st.markdown("""
 def parse_similarity(similarity_str):
     """Parse similarity string and return a normalized float between 0 and 1."""
     try:
-        # Remove '%' if present and convert to float
-        if isinstance(similarity_str, str):
-            value = float(similarity_str.strip('%')) / 100
+        # Single float() call, clamp without max/min lookups
+        if isinstance(similarity_str, str) and similarity_str.endswith('%'):
+            value = float(similarity_str[:-1]) / 100
         else:
             value = float(similarity_str)
-        
-        # Clamp value between 0 and 1
-        return max(0.0, min(1.0, value))
     except (ValueError, TypeError):
         return 0.0
+    return 0.0 if value < 0.0 else (1.0 if value > 1.0 else value)
+
+def pack_sources(sources):
+    """
+    Convert kb_sources (list of dicts) into a struct-of-arrays layout.
+
+    Parsing, clamping and emoji classification happen once here with
+    vectorized NumPy calls; the render loop then just zips over the
+    arrays on every rerun instead of re-running per-source Python logic.
+    """
+    sim = np.clip(
+        np.array(
+            [parse_similarity(s.get("similarity", "0%")) for s in sources],
+            dtype=np.float32,
+        ),
+        0,
+        1,
+    )
+    emoji = np.where(sim >= 0.7, "🟢", np.where(sim >= 0.4, "🟡", "🔴"))
+    return {
+        "source": [s.get("source", "Unknown") for s in sources],
+        "page": [s.get("page", "N/A") for s in sources],
+        "excerpt": [s.get("excerpt", "No excerpt available") for s in sources],
+        "sim": sim,
+        "emoji": emoji.tolist(),
+    }
+
+
+# Relevance thresholds with their emoji and CSS class, highest first
+_RELEVANCE = [
+    (0.7, "🟢", "relevance-high"),
+    (0.4, "🟡", "relevance-medium"),
+    (-1.0, "🔴", "relevance-low"),
+]
+
+def classify_relevance(value):
+    """Parse/clamp a similarity value and classify it in a single pass.
+
+    Returns:
+        Tuple of (normalized value, emoji, CSS class)
+    """
+    value = parse_similarity(value)
+    for threshold, emoji, css_class in _RELEVANCE:
+        if value >= threshold:
+            return value, emoji, css_class
 
 def get_relevance_class(similarity_value):
     """Get CSS class based on similarity score."""
-    if similarity_value >= 0.7:
-        return "relevance-high"
-    elif similarity_value >= 0.4:
-        return "relevance-medium"
-    else:
-        return "relevance-low"
+    return classify_relevance(similarity_value)[2]
 
 def get_relevance_emoji(similarity_value):
     """Get emoji based on similarity score."""
-    if similarity_value >= 0.7:
-        return "🟢"
-    elif similarity_value >= 0.4:
-        return "🟡"
-    else:
-        return "🔴"
+    return classify_relevance(similarity_value)[1]
 
 # --- Initialization (Cached Resources) ---
 @st.cache_resource
 def get_system_components():
     """Initialize the backend components once and cache them."""
     try:
+        # Deferred imports: these pull in langchain/torch/transformers and
+        # only fire on the first run thanks to st.cache_resource
+        from knowledge_base import KnowledgeBase
+        from support_agent import SupportAgent
+        from ticket_system import TicketSystem
+
         kb = KnowledgeBase()
         tickets = TicketSystem()
         agent = SupportAgent(kb, tickets)
@@ -142,6 +181,21 @@ def get_system_components():
 
 kb, tickets, agent = get_system_components()
 
+@st.cache_data(ttl=30)
+def _ticket_option_data():
+    """Build the sidebar ticket options plus O(1) lookup maps, cached briefly."""
+    tickets_list = tickets.get_all_tickets()
+    option_ids = [None] + [t['ticket_id'] for t in tickets_list]
+    labels = {t['ticket_id']: f"{t['ticket_id']} - {t['title']}" for t in tickets_list}
+    index = {t['ticket_id']: i + 1 for i, t in enumerate(tickets_list)}
+    by_id = {t['ticket_id']: t for t in tickets_list}
+    return option_ids, labels, index, by_id
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _kb_collection_info():
+    """Collection info for the sidebar metric, refreshed at most every 5s."""
+    return kb.get_collection_info()
+
 # --- Session State Management ---
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -155,6 +209,10 @@ if "chat_started" not in st.session_state:
     st.session_state.chat_started = False
 if "kb_initialized" not in st.session_state:
     st.session_state.kb_initialized = False
+if "history_window" not in st.session_state:
+    st.session_state.history_window = 20
+if "pending_actions" not in st.session_state:
+    st.session_state.pending_actions = []
 
 # --- Sidebar ---
 with st.sidebar:
@@ -171,32 +229,25 @@ with st.sidebar:
     
     # Ticket Selection
     with st.expander("🎫 Select Ticket (Optional)", expanded=False):
-        all_tickets = tickets.get_all_tickets()
-        
-        ticket_options = ["None"] + [f"{t['ticket_id']} - {t['title']}" for t in all_tickets]
-        
-        current_selection = "None"
-        if st.session_state.current_ticket_id:
-            for opt in ticket_options:
-                if st.session_state.current_ticket_id in opt:
-                    current_selection = opt
-                    break
-        
+        option_ids, ticket_labels, ticket_index, tickets_by_id = _ticket_option_data()
+
+        # Options are ticket IDs; format_func renders the label, so no
+        # string parsing is needed to recover the selected ID
         selected = st.selectbox(
             "Choose existing ticket",
-            ticket_options,
-            index=ticket_options.index(current_selection),
+            option_ids,
+            index=ticket_index.get(st.session_state.current_ticket_id, 0),
+            format_func=lambda tid: "None" if tid is None else ticket_labels[tid],
             key="ticket_select"
         )
-        
-        if selected != "None":
-            ticket_id = selected.split(" - ")[0]
-            if ticket_id != st.session_state.current_ticket_id:
-                st.session_state.current_ticket_id = ticket_id
-                ticket_info = tickets.get_ticket(ticket_id)
+
+        if selected is not None:
+            if selected != st.session_state.current_ticket_id:
+                st.session_state.current_ticket_id = selected
+                ticket_info = tickets_by_id.get(selected)
                 if ticket_info:
                     st.session_state.user_name = ticket_info['customer_name']
-                st.success(f"✓ Ticket {ticket_id} selected!")
+                st.success(f"✓ Ticket {selected} selected!")
                 st.rerun()
         else:
             if st.session_state.current_ticket_id is not None:
@@ -220,11 +271,12 @@ with st.sidebar:
                 try:
                     status = kb.initialize_knowledge_base()
                     st.session_state.kb_initialized = True
+                    _kb_collection_info.clear()
                     st.success(f"✓ Loaded {status.get('docs_loaded', 0)} documents!")
                 except Exception as e:
                     st.error(f"Error: {e}")
-        
-        kb_info = kb.get_collection_info()
+
+        kb_info = _kb_collection_info()
         st.metric("Documents in KB", kb_info.get('document_count', 0))
     
     # Chat Controls
@@ -299,21 +351,20 @@ if not st.session_state.messages:
     
     sample_col1, sample_col2 = st.columns(2)
     
+    # Sample buttons queue an action instead of rerunning immediately;
+    # the commit point at the bottom of the script picks it up in this
+    # same run, so one click costs one rerun rather than three.
     with sample_col1:
         if st.button("🔐 How do I reset my password?", use_container_width=True):
-            st.session_state.sample_question = "How do I reset my password?"
-            st.rerun()
+            st.session_state.pending_actions.append("How do I reset my password?")
         if st.button("💳 What payment methods do you accept?", use_container_width=True):
-            st.session_state.sample_question = "What payment methods do you accept?"
-            st.rerun()
-    
+            st.session_state.pending_actions.append("What payment methods do you accept?")
+
     with sample_col2:
         if st.button("🚀 How do I upgrade my plan?", use_container_width=True):
-            st.session_state.sample_question = "How do I upgrade my plan?"
-            st.rerun()
+            st.session_state.pending_actions.append("How do I upgrade my plan?")
         if st.button("📧 I'm not receiving verification emails", use_container_width=True):
-            st.session_state.sample_question = "I'm not receiving verification emails"
-            st.rerun()
+            st.session_state.pending_actions.append("I'm not receiving verification emails")
 
 # Chat Interface
 else:
@@ -332,49 +383,71 @@ else:
     
     st.markdown("---")
     
-    # Display Chat Messages
-    for msg in st.session_state.messages:
+    # Display Chat Messages — only the most recent window, so rerun cost
+    # stays O(window) instead of growing with the whole session
+    hidden_count = len(st.session_state.messages) - st.session_state.history_window
+    if hidden_count > 0:
+        if st.button(f"⬆️ Load earlier messages ({hidden_count} hidden)",
+                     use_container_width=True):
+            st.session_state.history_window += 20
+            st.rerun()
+
+    for msg in st.session_state.messages[-st.session_state.history_window:]:
         with st.chat_message(msg["role"], avatar="👤" if msg["role"] == "user" else "🤖"):
             st.markdown(msg["content"])
             
             # Show sources in a cleaner way
             if msg["role"] == "assistant" and "sources" in msg and msg["sources"]:
+                src = msg["sources"]
+                if isinstance(src, list):
+                    # Legacy list-of-dicts from older sessions
+                    src = pack_sources(src)
+                n_sources = len(src["source"])
                 with st.expander("📚 View Sources & References", expanded=False):
-                    for idx, source in enumerate(msg["sources"], 1):
-                        # Parse similarity safely
-                        similarity_value = parse_similarity(source.get('similarity', '0%'))
-                        relevance_emoji = get_relevance_emoji(similarity_value)
-                        
+                    rows = zip(src["source"], src["page"], src["excerpt"],
+                               src["sim"], src["emoji"])
+                    for idx, (name, page, excerpt, sim, emoji) in enumerate(rows, 1):
                         col1, col2 = st.columns([3, 1])
-                        
+
                         with col1:
-                            st.markdown(f"**{idx}. {source['source']}** (Page {source['page']})")
-                            st.caption(f"_{source.get('excerpt', 'No excerpt available')}_")
-                        
+                            st.markdown(f"**{idx}. {name}** (Page {page})")
+                            st.caption(f"_{excerpt}_")
+
                         with col2:
-                            st.markdown(f"{relevance_emoji} **{similarity_value:.0%}**")
+                            st.markdown(f"{emoji} **{sim:.0%}**")
                             st.caption("Relevance")
-                        
-                        if idx < len(msg["sources"]):
+
+                        if idx < n_sources:
                             st.divider()
 
 # Chat Input (always at bottom)
 st.markdown("---")
 
-# Handle sample question
-if "sample_question" in st.session_state:
-    prompt = st.session_state.sample_question
-    del st.session_state.sample_question
+# Commit point: drain one queued action, else read the chat input
+if st.session_state.pending_actions:
+    prompt = st.session_state.pending_actions.pop(0)
+
+    # Merge duplicate submissions arriving within 100ms (double-clicks,
+    # button + rerun races)
+    now = time.monotonic()
+    if (prompt == st.session_state.get("last_action")
+            and now - st.session_state.get("last_action_ts", 0.0) < 0.1):
+        prompt = None
+    else:
+        st.session_state.last_action = prompt
+        st.session_state.last_action_ts = now
 else:
     prompt = st.chat_input("💬 Type your message here...", key="chat_input")
 
 if prompt:
-    # Add user message
+    # Add user message and render it inline; the agent response is
+    # produced in this same script run so each chat turn costs exactly
+    # one rerun instead of two.
     st.session_state.messages.append({"role": "user", "content": prompt})
     st.session_state.chat_started = True
-    
-    # Rerun to show user message
-    st.rerun()
+
+    with st.chat_message("user", avatar="👤"):
+        st.markdown(prompt)
 
 # Process last message if it's from user and needs response
 if st.session_state.messages and st.session_state.messages[-1]["role"] == "user":
@@ -389,12 +462,12 @@ if st.session_state.messages and st.session_state.messages[-1]["role"] == "user"
                 
                 agent_msg = response_data["agent_response"]
                 sources = response_data.get("kb_sources", [])
-                
-                # Save to history
+
+                # Save to history with sources pre-packed as struct-of-arrays
                 st.session_state.messages.append({
                     "role": "assistant",
                     "content": agent_msg,
-                    "sources": sources
+                    "sources": pack_sources(sources) if sources else []
                 })
                 
                 st.rerun()
@@ -460,16 +533,21 @@ if "show_kb_search" in st.session_state and st.session_state.show_kb_search:
             with st.spinner("Searching..."):
                 results = kb.search(search_query)
                 st.success(f"Found {len(results)} results")
-                
-                for doc, score in results:
-                    # Normalize score safely
-                    normalized_score = max(0.0, min(1.0, float(score)))
-                    relevance_emoji = get_relevance_emoji(normalized_score)
-                    
-                    st.markdown(f"{relevance_emoji} **Relevance: {normalized_score:.1%}**")
-                    st.info(doc.page_content[:300] + "...")
-                    st.caption(f"Source: {doc.metadata.get('source', 'Unknown')} | Page: {doc.metadata.get('page', 'N/A')}")
-                    st.divider()
+
+                if results:
+                    # One dataframe render instead of four widgets per result
+                    classified = [classify_relevance(score) for _, score in results]
+                    df = pd.DataFrame({
+                        "Relevance": [f"{emoji} {value:.1%}"
+                                      for value, emoji, _ in classified],
+                        "Source": [doc.metadata.get('source', 'Unknown')
+                                   for doc, _ in results],
+                        "Page": [doc.metadata.get('page', 'N/A')
+                                 for doc, _ in results],
+                        "Excerpt": [doc.page_content[:300]
+                                    for doc, _ in results],
+                    })
+                    st.dataframe(df, use_container_width=True, hide_index=True)
         
         if st.button("Close", use_container_width=True):
             st.session_state.show_kb_search = False
@@ -1,4 +1,5 @@
 # config.py
+import gc
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -6,11 +7,18 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+# Reduce GC pressure: the default gen-0 threshold of 700 triggers constant
+# collections while chunking documents and building chat contexts
+gc.set_threshold(50000, 10, 10)
+
 # API Configuration
 API_HOST = "0.0.0.0"
 API_PORT = 8000
 DEBUG = True
 
+# Uvicorn worker processes for production runs (0 = 2*cores+1)
+WORKERS = int(os.getenv("WORKERS", "0"))
+
 # OpenAI Configuration
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_MODEL = os.getenv("GROQ_MODEL")
@@ -38,3 +46,7 @@ KB_SEARCH_RESULTS = 5
 # Session Configuration
 MAX_CHAT_HISTORY = 50
 SESSION_TIMEOUT_MINUTES = 30
+
+# Cap on chat histories kept in the agent; least-recently-used chats
+# are evicted beyond this
+MAX_ACTIVE_CHATS = int(os.getenv("MAX_ACTIVE_CHATS", "1000"))
@@ -0,0 +1,95 @@
+# embed_batcher.py
+"""
+Micro-batching for concurrent query embeddings.
+
+Under concurrent load each request embedded its query individually,
+paying N forward passes for N in-flight requests. EmbedBatcher collects
+queries arriving within a short window and embeds them with a single
+embed_documents call — embedding models are far cheaper per text when
+batched. Callers just `await batcher.embed(text)`; the returned future
+resolves when the batch it landed in flushes (size or age triggered).
+"""
+import asyncio
+import logging
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+
+class EmbedBatcher:
+    """Coalesce concurrent embed calls into single batched model calls."""
+
+    def __init__(
+        self,
+        embed_documents: Callable[[List[str]], List[List[float]]],
+        max_batch_size: int = 32,
+        max_delay: float = 0.008,
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            embed_documents: Batch embedding function (sync; runs in a
+                worker thread)
+            max_batch_size: Flush as soon as this many texts are pending
+            max_delay: Flush when the oldest pending text is this old
+                (seconds); bounds the p99 tax a batch can add
+        """
+        self._embed_documents = embed_documents
+        self._max_batch = max_batch_size
+        self._max_delay = max_delay
+        # Created lazily so construction needs no running event loop
+        self._queue: asyncio.Queue = None
+        self._task: asyncio.Task = None
+
+    async def embed(self, text: str) -> List[float]:
+        """
+        Embed one text, sharing a model call with concurrent callers.
+
+        Args:
+            text: The text to embed
+
+        Returns:
+            The embedding vector
+        """
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._flush_loop())
+
+        future = loop.create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _flush_loop(self) -> None:
+        """Drain the queue forever, embedding one batch per iteration."""
+        loop = asyncio.get_running_loop()
+        while True:
+            # Block for the first item, then top the batch up until it
+            # is full or the window has elapsed
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self._max_delay
+            while len(batch) < self._max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self._queue.get(), timeout)
+                    )
+                except asyncio.TimeoutError:
+                    break
+
+            texts = [text for text, _future in batch]
+            try:
+                vectors = await asyncio.to_thread(self._embed_documents, texts)
+            except Exception as e:
+                logger.error(f"Error embedding batch of {len(texts)}: {str(e)}")
+                for _text, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_text, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
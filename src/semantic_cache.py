@@ -0,0 +1,160 @@
+# semantic_cache.py
+"""
+Embedding-based response cache.
+
+Near-identical user questions ("how do I reset my password" in a dozen
+phrasings) each paid for an embedding, a vector search and an LLM call.
+SemanticCache short-circuits repeats with two tiers: an exact tier keyed
+by a hash of the normalized query text, and a semantic tier that
+compares the query embedding against cached query embeddings and
+returns the stored payload when cosine similarity clears a threshold.
+"""
+import hashlib
+import logging
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+import numpy as np
+
+from _sim_kernels import topk_cosine
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """Two-tier (exact hash + embedding similarity) cache for query results."""
+
+    def __init__(
+        self,
+        embed_fn: Callable[[str], List[float]],
+        threshold: float = 0.92,
+        max_entries: int = 512,
+        ttl_seconds: int = 86400,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            embed_fn: Function mapping a query string to an embedding
+            threshold: Minimum cosine similarity for a semantic hit
+            max_entries: Cap on cached entries; oldest are evicted
+            ttl_seconds: Lifetime of a cached entry
+        """
+        self._embed = embed_fn
+        self._threshold = threshold
+        self._max = max_entries
+        self._ttl = ttl_seconds
+        self._lock = threading.Lock()
+
+        # Parallel arrays: one row in _vectors per cached entry
+        self._vectors: Optional[np.ndarray] = None
+        self._payloads: List[Any] = []
+        self._expires: List[float] = []
+        self._namespaces: List[str] = []
+        self._exact: dict = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _exact_key(query: str, namespace: str) -> str:
+        text = f"{namespace}\x00{query.strip().lower()}"
+        return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+    def _embed_normalized(self, query: str) -> np.ndarray:
+        vec = np.asarray(self._embed(query), dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def _evict_locked(self) -> None:
+        """Drop expired entries, then the oldest ones if still over cap."""
+        now = time.monotonic()
+        keep = [i for i, exp in enumerate(self._expires) if exp > now]
+        overflow = len(keep) - self._max + 1
+        if overflow > 0:
+            keep = keep[overflow:]
+        if len(keep) == len(self._expires):
+            return
+
+        keep_set = set(keep)
+        self._vectors = self._vectors[keep] if keep else None
+        self._payloads = [self._payloads[i] for i in keep]
+        self._expires = [self._expires[i] for i in keep]
+        self._namespaces = [self._namespaces[i] for i in keep]
+        remap = {old: new for new, old in enumerate(keep)}
+        self._exact = {
+            k: remap[i] for k, i in self._exact.items() if i in keep_set
+        }
+
+    def get(self, query: str, namespace: str = "") -> Optional[Any]:
+        """
+        Look up a cached payload for a query.
+
+        Args:
+            query: The query text
+            namespace: Isolation key (e.g. ticket ID) so entries never
+                leak across contexts
+
+        Returns:
+            The cached payload, or None on a miss
+        """
+        now = time.monotonic()
+        key = self._exact_key(query, namespace)
+
+        with self._lock:
+            idx = self._exact.get(key)
+            if idx is not None and self._expires[idx] > now:
+                self.hits += 1
+                return self._payloads[idx]
+
+        if self._vectors is None:
+            self.misses += 1
+            return None
+
+        # Embed outside the lock; the matmul below is read-only and cheap
+        vec = self._embed_normalized(query)
+
+        with self._lock:
+            if self._vectors is None:
+                self.misses += 1
+                return None
+            # Fused dot-product + selection kernel (numba when available)
+            indices, scores = topk_cosine(self._vectors, vec, 1)
+            best = int(indices[0])
+            if (
+                scores[0] >= self._threshold
+                and self._namespaces[best] == namespace
+                and self._expires[best] > now
+            ):
+                self.hits += 1
+                return self._payloads[best]
+
+        self.misses += 1
+        return None
+
+    def put(self, query: str, payload: Any, namespace: str = "") -> None:
+        """Store a payload under both the exact and semantic tiers."""
+        vec = self._embed_normalized(query)
+        key = self._exact_key(query, namespace)
+
+        with self._lock:
+            self._evict_locked()
+            row = vec.reshape(1, -1)
+            if self._vectors is None:
+                self._vectors = row
+            else:
+                self._vectors = np.vstack([self._vectors, row])
+            self._payloads.append(payload)
+            self._expires.append(time.monotonic() + self._ttl)
+            self._namespaces.append(namespace)
+            self._exact[key] = len(self._payloads) - 1
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        with self._lock:
+            self._vectors = None
+            self._payloads = []
+            self._expires = []
+            self._namespaces = []
+            self._exact = {}
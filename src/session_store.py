@@ -0,0 +1,146 @@
+# session_store.py
+"""
+Chat session storage with TTL expiry and LRU eviction.
+
+The previous bare module-level dict grew without bound and could not be
+shared across uvicorn workers. SessionStore keeps the same data shape
+(one ChatSession per chat plus its message list) behind a small async
+API that
+mirrors how the sessions would live in Redis (a hash per session plus a
+list of messages with an EXPIRE) — a redis.asyncio backend can implement
+the same methods without touching the handlers. The in-memory backend
+here is per-process: multi-worker deployments should swap in Redis.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class ChatSession:
+    """
+    One chat session's state.
+
+    A slots dataclass instead of a per-session dict: attribute access
+    replaces hashed key probes and per-object memory drops ~3x, which
+    adds up at the store's 10k-session cap. ``message_count`` is kept as
+    a counter so listing endpoints never touch the message list.
+    """
+    customer_name: str
+    ticket_id: Optional[str]
+    created_at: datetime
+    created_at_iso: str
+    messages: List[dict] = field(default_factory=list)
+    message_count: int = 0
+
+
+class SessionStore:
+    """In-memory async session store with TTL and bounded size."""
+
+    def __init__(self, ttl_seconds: int = None, max_sessions: int = 10_000):
+        """
+        Initialize the store.
+
+        Args:
+            ttl_seconds: Idle lifetime of a session; defaults to
+                config.SESSION_TIMEOUT_MINUTES
+            max_sessions: LRU cap on concurrently stored sessions
+        """
+        self._ttl = ttl_seconds or config.SESSION_TIMEOUT_MINUTES * 60
+        self._max = max_sessions
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._expires: Dict[str, float] = {}
+        self._lock = asyncio.Lock()
+
+    def _purge_expired(self, now: float) -> None:
+        """Drop expired sessions (caller must hold the lock)."""
+        # Oldest-accessed entries sit at the front of the OrderedDict, so
+        # we can stop at the first live one
+        expired = []
+        for chat_id in self._sessions:
+            if self._expires.get(chat_id, 0) <= now:
+                expired.append(chat_id)
+            else:
+                break
+        for chat_id in expired:
+            del self._sessions[chat_id]
+            del self._expires[chat_id]
+        if expired:
+            logger.info(f"Expired {len(expired)} idle chat sessions")
+
+    def _touch(self, chat_id: str, now: float) -> None:
+        """Refresh TTL and LRU position (caller must hold the lock)."""
+        self._sessions.move_to_end(chat_id)
+        self._expires[chat_id] = now + self._ttl
+
+    async def put(self, chat_id: str, session: ChatSession) -> None:
+        """Store a new session, evicting the LRU entry if at capacity."""
+        now = time.monotonic()
+        async with self._lock:
+            self._purge_expired(now)
+            while len(self._sessions) >= self._max:
+                evicted, _ = self._sessions.popitem(last=False)
+                self._expires.pop(evicted, None)
+                logger.warning(f"Evicted LRU chat session: {evicted}")
+            self._sessions[chat_id] = session
+            self._touch(chat_id, now)
+
+    async def get(self, chat_id: str) -> Optional[ChatSession]:
+        """Fetch a session and refresh its TTL, or None if absent/expired."""
+        now = time.monotonic()
+        async with self._lock:
+            session = self._sessions.get(chat_id)
+            if session is None:
+                return None
+            if self._expires.get(chat_id, 0) <= now:
+                del self._sessions[chat_id]
+                del self._expires[chat_id]
+                return None
+            self._touch(chat_id, now)
+            return session
+
+    async def append_message(self, chat_id: str, message: dict) -> bool:
+        """Append a message to a session's history."""
+        session = await self.get(chat_id)
+        if session is None:
+            return False
+        session.messages.append(message)
+        session.message_count += 1
+        return True
+
+    async def clear_messages(self, chat_id: str) -> bool:
+        """Empty a session's message history."""
+        session = await self.get(chat_id)
+        if session is None:
+            return False
+        session.messages = []
+        session.message_count = 0
+        return True
+
+    async def delete(self, chat_id: str) -> bool:
+        """Remove a session entirely."""
+        async with self._lock:
+            self._expires.pop(chat_id, None)
+            return self._sessions.pop(chat_id, None) is not None
+
+    async def items(self) -> List[Tuple[str, ChatSession]]:
+        """Snapshot of (chat_id, session) pairs for listing endpoints."""
+        now = time.monotonic()
+        async with self._lock:
+            self._purge_expired(now)
+            return list(self._sessions.items())
+
+    async def count(self) -> int:
+        """Number of live sessions."""
+        now = time.monotonic()
+        async with self._lock:
+            self._purge_expired(now)
+            return len(self._sessions)
@@ -1,7 +1,10 @@
 # support_agent.py
+import asyncio
+import functools
 import logging
+import threading
+from collections import OrderedDict, deque
 from typing import List, Tuple, Dict, Optional
-from langchain_groq import ChatGroq
 from langchain_core.prompts import (
     ChatPromptTemplate,
     SystemMessagePromptTemplate,
@@ -9,16 +12,35 @@ from langchain_core.prompts import (
 )
 from langchain.messages import HumanMessage, AIMessage
 from knowledge_base import KnowledgeBase
+from semantic_cache import SemanticCache
 from ticket_system import TicketSystem
 import config
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-os.environ["GROQ_API_KEY"] = config.GROQ_API_KEY
+# Shared LLM client: each ChatGroq owns an HTTP connection pool, so one
+# instance across all agents means one set of keep-alive connections to
+# Groq instead of fresh TLS handshakes per agent
+_LLM_SINGLETON = None
+_LLM_LOCK = threading.Lock()
+
+
+def _get_llm():
+    """Return the shared ChatGroq client, creating it on first use."""
+    global _LLM_SINGLETON
+    if _LLM_SINGLETON is None:
+        with _LLM_LOCK:
+            if _LLM_SINGLETON is None:
+                # Imported here so importing this module stays cheap
+                # when no agent is instantiated (e.g. tooling, cold starts)
+                from langchain_groq import ChatGroq
+
+                _LLM_SINGLETON = ChatGroq(
+                    model="openai/gpt-oss-120b",
+                    temperature=0,
+                    api_key=config.GROQ_API_KEY,
+                )
+    return _LLM_SINGLETON
 
 
 class SupportAgent:
@@ -35,15 +57,34 @@ class SupportAgent:
         self.kb = knowledge_base
         self.tickets = ticket_system
 
-        # Initialize LLM
-        self.llm = ChatGroq(
-            model="openai/gpt-oss-120b",
-            temperature=0,
-            api_key=config.GROQ_API_KEY,
+        # Initialize LLM (shared client, see _get_llm)
+        self.llm = _get_llm()
+
+        # Conversation history storage: LRU-ordered and capped, so dead
+        # chats don't accumulate wrapped message objects forever
+        self.conversation_history = OrderedDict()
+
+        # The system prompt is a constant; build it once instead of per turn
+        self._system_prompt = self._create_system_prompt()
+
+        # LLM micro-batching state (see _allm_invoke); created lazily so
+        # construction needs no running event loop
+        self._llm_queue = None
+        self._llm_task = None
+
+        # Semantic response cache: near-duplicate messages answered
+        # recently skip both the KB search and the LLM round-trip.
+        # Namespaced by ticket so answers never leak across tickets.
+        self._response_cache = SemanticCache(
+            embed_fn=knowledge_base.embeddings.embed_query,
+            threshold=0.95,
         )
 
-        # Conversation history storage
-        self.conversation_history = {}
+        # Exact-repeat embeddings ("reset my password" in identical form)
+        # come from this bounded cache instead of a model forward pass
+        self._embed = functools.lru_cache(maxsize=2048)(
+            knowledge_base.embeddings.embed_query
+        )
 
         logger.info("Support Agent initialized")
 
@@ -67,28 +108,56 @@ When responding:
 
 The customer may reference a ticket ID. Use this to provide personalized support based on their existing issue history."""
 
-    def _search_knowledge_base(self, query: str) -> List[Tuple[str, Dict, float]]:
+    @staticmethod
+    def _as_result_tuples(results) -> List[Tuple[str, Dict, float, str, str]]:
         """
-        Search the knowledge base for relevant information.
+        Convert (Document, score) pairs into result tuples with excerpts.
+
+        The 500- and 200-char excerpts are sliced here, once per result,
+        so the context formatter and the sources list both reuse them
+        instead of re-slicing the same content every turn.
 
         Args:
-            query: Search query
+            results: (Document, similarity) pairs from the knowledge base
 
         Returns:
-            List of (document, metadata, similarity) tuples
+            List of (text, metadata, similarity, excerpt_500, excerpt_200)
         """
-        logger.info(f"Searching knowledge base for: {query}")
-        results = self.kb.search(query, n_results=config.KB_SEARCH_RESULTS)
-        logger.info(f"Found {len(results)} knowledge base results")
-
-        # Convert Document objects to (text, metadata, score) tuples
         formatted_results = []
         for doc, similarity in results:
-            formatted_results.append((doc.page_content, doc.metadata, similarity))
-
+            text = doc.page_content
+            formatted_results.append((
+                text,
+                doc.metadata,
+                similarity,
+                text[:500] + "..." if len(text) > 500 else text,
+                text[:200] + "..." if len(text) > 200 else text,
+            ))
         return formatted_results
 
-    def _format_kb_context(self, kb_results: List[Tuple[str, Dict, float]]) -> str:
+    def _search_knowledge_base(
+        self, query: str
+    ) -> List[Tuple[str, Dict, float, str, str]]:
+        """
+        Search the knowledge base for relevant information.
+
+        Args:
+            query: Search query
+
+        Returns:
+            List of result tuples (see _as_result_tuples)
+        """
+        logger.debug("Searching knowledge base for: %s", query)
+        results = self.kb.search_by_vector(
+            self._embed(query), n_results=config.KB_SEARCH_RESULTS
+        )
+        logger.debug("Found %d knowledge base results", len(results))
+
+        return self._as_result_tuples(results)
+
+    def _format_kb_context(
+        self, kb_results: List[Tuple[str, Dict, float, str, str]]
+    ) -> str:
         """
         Format knowledge base search results into context.
 
@@ -101,19 +170,24 @@ The customer may reference a ticket ID. Use this to provide personalized support
         if not kb_results:
             return ""
 
-        context = "\n\nRelevant Information from Knowledge Base:\n"
-        context += "=" * 50 + "\n"
+        # Fragment list + join: linear-time assembly instead of
+        # quadratic-risk += concatenation in the loop
+        parts = [
+            "\n\nRelevant Information from Knowledge Base:\n",
+            "=" * 50,
+            "\n",
+        ]
 
-        for i, (doc, metadata, similarity) in enumerate(kb_results, 1):
+        for i, (_doc, metadata, similarity, excerpt, _short) in enumerate(
+            kb_results, 1
+        ):
             source = metadata.get("source", "Unknown")
             page = metadata.get("page", "N/A")
-            context += f"\n[Source {i}] {source} (Page {page})\n"
-            context += f"Relevance: {similarity:.1%}\n"
-            context += (
-                f"Content: {doc[:500]}...\n" if len(doc) > 500 else f"Content: {doc}\n"
-            )
+            parts.append(f"\n[Source {i}] {source} (Page {page})\n")
+            parts.append(f"Relevance: {similarity:.1%}\n")
+            parts.append(f"Content: {excerpt}\n")
 
-        return context
+        return "".join(parts)
 
     def _get_ticket_context(self, ticket_id: str) -> str:
         """
@@ -128,17 +202,66 @@ The customer may reference a ticket ID. Use this to provide personalized support
         ticket = self.tickets.get_ticket(ticket_id)
         if not ticket:
             return ""
+        return self._build_ticket_context(ticket)
+
+    def _build_ticket_context(self, ticket: Dict) -> str:
+        """Format ticket context from an already-fetched ticket dict."""
+        return "".join([
+            "\n\nTicket Information:\n",
+            "=" * 50,
+            "\n",
+            self.tickets.format_ticket_summary(ticket),
+        ])
+
+    def _assemble_messages(
+        self,
+        user_message: str,
+        chat_id: str,
+        kb_results: List[Tuple[str, Dict, float, str, str]],
+        ticket_context: str,
+    ) -> List:
+        """
+        Build the LLM message list from already-gathered context.
 
-        context = "\n\nTicket Information:\n"
-        context += "=" * 50 + "\n"
-        context += self.tickets.get_ticket_summary(ticket_id)
-        return context
+        Args:
+            user_message: The user's message
+            chat_id: Unique chat session ID
+            kb_results: Knowledge base search results
+            ticket_context: Pre-formatted ticket context (may be empty)
 
-    def process_message(
+        Returns:
+            List of messages ready for the LLM
+        """
+        history = self._touch_history(chat_id)
+
+        kb_context = self._format_kb_context(kb_results)
+
+        # Build the prompt from the precomputed system prompt
+        system_prompt = self._system_prompt
+
+        # Create messages for the LLM
+        messages = []
+
+        # Add system message (single join instead of chained +=)
+        messages.append(
+            ("system", "".join([system_prompt, ticket_context, kb_context]))
+        )
+
+        # Add conversation history; entries are already HumanMessage/
+        # AIMessage objects, so replay is a straight extend instead of
+        # O(history) object construction per turn
+        messages.extend(history)
+
+        # Add current user message
+        messages.append(HumanMessage(content=user_message))
+
+        return messages
+
+    def _prepare_turn(
         self, user_message: str, chat_id: str, ticket_id: Optional[str] = None
-    ) -> Dict:
+    ) -> Tuple[List, List[Tuple[str, Dict, float, str, str]], Optional[Dict]]:
         """
-        Process a user message and generate an agent response.
+        Build the LLM message list and gather context for one chat turn.
 
         Args:
             user_message: The user's message
@@ -146,82 +269,320 @@ The customer may reference a ticket ID. Use this to provide personalized support
             ticket_id: Optional ticket ID for context
 
         Returns:
-            Dictionary with agent response and metadata
+            Tuple of (messages, kb_results, ticket_info)
         """
-        logger.info(f"Processing message for chat {chat_id}: {user_message[:100]}")
-
-        # Initialize conversation history for this chat if needed
-        if chat_id not in self.conversation_history:
-            self.conversation_history[chat_id] = []
-
         # Search knowledge base
         kb_results = self._search_knowledge_base(user_message)
-        kb_context = self._format_kb_context(kb_results)
 
-        # Get ticket context if provided
+        # Get ticket context if provided (one fetch serves both the
+        # returned ticket_info and the formatted context)
         ticket_context = ""
         ticket_info = None
         if ticket_id:
             ticket_info = self.tickets.get_ticket(ticket_id)
-            ticket_context = self._get_ticket_context(ticket_id)
+            if ticket_info:
+                ticket_context = self._build_ticket_context(ticket_info)
 
-        # Build the prompt
-        system_prompt = self._create_system_prompt()
+        messages = self._assemble_messages(
+            user_message, chat_id, kb_results, ticket_context
+        )
+        return messages, kb_results, ticket_info
 
-        full_context = ""
-        if ticket_context:
-            full_context += ticket_context
-        if kb_context:
-            full_context += kb_context
+    async def _aprepare_turn(
+        self, user_message: str, chat_id: str, ticket_id: Optional[str] = None
+    ) -> Tuple[List, List[Tuple[str, Dict, float, str, str]], Optional[Dict]]:
+        """
+        Async _prepare_turn: the KB vector search and the ticket lookup
+        are independent I/O, so they run concurrently — the turn waits
+        for max(KB, ticket) instead of their sum.
 
-        # Create messages for the LLM
-        messages = []
+        Args:
+            user_message: The user's message
+            chat_id: Unique chat session ID
+            ticket_id: Optional ticket ID for context
 
-        # Add system message
-        messages.append(("system", system_prompt + full_context))
+        Returns:
+            Tuple of (messages, kb_results, ticket_info)
+        """
+        kb_task = asyncio.ensure_future(
+            self.kb.asearch(user_message, n_results=config.KB_SEARCH_RESULTS)
+        )
 
-        # Add conversation history
-        for role, content in self.conversation_history[chat_id]:
-            if role == "user":
-                messages.append(HumanMessage(content=content))
-            else:
-                messages.append(AIMessage(content=content))
+        ticket_info = None
+        if ticket_id:
+            # A dict lookup today, but to_thread future-proofs DB backends
+            results, ticket_info = await asyncio.gather(
+                kb_task, asyncio.to_thread(self.tickets.get_ticket, ticket_id)
+            )
+        else:
+            results = await kb_task
 
-        # Add current user message
-        messages.append(HumanMessage(content=user_message))
+        kb_results = self._as_result_tuples(results)
 
-        # Get response from LLM
-        try:
-            response = self.llm.invoke(messages)
-            agent_response = response.content
-        except Exception as e:
-            logger.error(f"Error getting LLM response: {str(e)}")
-            agent_response = "I apologize, but I encountered an error processing your request. Please try again."
+        ticket_context = ""
+        if ticket_info:
+            ticket_context = self._build_ticket_context(ticket_info)
 
-        # Update conversation history
-        self.conversation_history[chat_id].append(("user", user_message))
-        self.conversation_history[chat_id].append(("assistant", agent_response))
+        messages = self._assemble_messages(
+            user_message, chat_id, kb_results, ticket_context
+        )
+        return messages, kb_results, ticket_info
+
+    def _touch_history(self, chat_id: str) -> deque:
+        """
+        Get a chat's history deque, creating it on first use.
 
-        # Keep only recent history
-        if len(self.conversation_history[chat_id]) > config.MAX_CHAT_HISTORY:
-            self.conversation_history[chat_id] = self.conversation_history[chat_id][
-                -config.MAX_CHAT_HISTORY :
-            ]
+        Access refreshes the chat's LRU position; when the number of
+        tracked chats exceeds MAX_ACTIVE_CHATS, the least recently used
+        one is dropped, bounding total memory under sustained traffic.
+        """
+        history = self.conversation_history.get(chat_id)
+        if history is None:
+            history = self.conversation_history[chat_id] = deque(
+                maxlen=config.MAX_CHAT_HISTORY
+            )
+            while len(self.conversation_history) > config.MAX_ACTIVE_CHATS:
+                evicted, _ = self.conversation_history.popitem(last=False)
+                logger.info(f"Evicted idle chat history: {evicted}")
+        else:
+            self.conversation_history.move_to_end(chat_id)
+        return history
 
-        # Format KB sources
-        kb_sources = [
+    def _record_turn(self, chat_id: str, user_message: str, agent_response: str) -> None:
+        """Append the exchange to conversation history (maxlen trims it)."""
+        history = self._touch_history(chat_id)
+        history.append(HumanMessage(content=user_message))
+        history.append(AIMessage(content=agent_response))
+
+    def _format_sources(
+        self, kb_results: List[Tuple[str, Dict, float, str, str]]
+    ) -> List[Dict]:
+        """Format KB search results for API responses."""
+        return [
             {
                 "source": metadata.get("source", "Unknown"),
                 "page": metadata.get("page", "N/A"),
                 "similarity": f"{similarity:.1%}",
-                "excerpt": doc[:200] + "..." if len(doc) > 200 else doc,
+                "excerpt": excerpt,
             }
-            for doc, metadata, similarity in kb_results
+            for _doc, metadata, similarity, _long, excerpt in kb_results
         ]
 
+    # Coalescing window and cap for concurrent LLM calls
+    _LLM_BATCH_WINDOW = 0.015
+    _LLM_MAX_BATCH = 16
+
+    async def _allm_invoke(self, messages: List):
+        """
+        Invoke the LLM, sharing a batched round-trip with concurrent calls.
+
+        Concurrent turns landing within the coalescing window ride one
+        llm.abatch call instead of one HTTPS round-trip each, amortizing
+        connection and header costs. A lone request still goes out after
+        at most the window delay, so single-request latency is bounded.
+        """
+        loop = asyncio.get_running_loop()
+        if self._llm_task is None or self._llm_task.done():
+            self._llm_queue = asyncio.Queue()
+            self._llm_task = loop.create_task(self._llm_flush_loop())
+
+        future = loop.create_future()
+        await self._llm_queue.put((messages, future))
+        return await future
+
+    async def _llm_flush_loop(self) -> None:
+        """Drain queued LLM calls, one batch per iteration."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._llm_queue.get()]
+            deadline = loop.time() + self._LLM_BATCH_WINDOW
+            while len(batch) < self._LLM_MAX_BATCH:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self._llm_queue.get(), timeout)
+                    )
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                if len(batch) == 1:
+                    responses = [await self.llm.ainvoke(batch[0][0])]
+                else:
+                    responses = await self.llm.abatch(
+                        [messages for messages, _future in batch]
+                    )
+            except Exception as e:
+                for _messages, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_messages, future), response in zip(batch, responses):
+                if not future.done():
+                    future.set_result(response)
+
+    def process_message(
+        self,
+        user_message: str,
+        chat_id: str,
+        ticket_id: Optional[str] = None,
+        include_sources: bool = True,
+    ) -> Dict:
+        """
+        Process a user message and generate an agent response.
+
+        Thin sync wrapper around aprocess_message for callers without a
+        running event loop.
+
+        Args:
+            user_message: The user's message
+            chat_id: Unique chat session ID
+            ticket_id: Optional ticket ID for context
+            include_sources: Whether to include kb_sources in the result
+
+        Returns:
+            Dictionary with agent response and metadata
+        """
+        return asyncio.run(
+            self.aprocess_message(
+                user_message, chat_id, ticket_id, include_sources
+            )
+        )
+
+    async def aprocess_message(
+        self,
+        user_message: str,
+        chat_id: str,
+        ticket_id: Optional[str] = None,
+        include_sources: bool = True,
+    ) -> Dict:
+        """
+        Process a user message and generate an agent response (async).
+
+        The KB search and ticket fetch run concurrently and the LLM is
+        awaited natively, so the event loop is never blocked and the
+        turn's latency is max(KB, ticket) + LLM rather than their sum.
+
+        Args:
+            user_message: The user's message
+            chat_id: Unique chat session ID
+            ticket_id: Optional ticket ID for context
+            include_sources: Whether to include kb_sources in the result;
+                callers that only surface agent_response can skip the
+                per-turn source-list build
+
+        Returns:
+            Dictionary with agent response and metadata
+        """
+        logger.debug("Processing message for chat %s: %s", chat_id, user_message[:100])
+
+        # Semantic cache first: a near-identical message answered recently
+        # returns in one in-memory NN lookup instead of a KB search plus a
+        # multi-second LLM call. The turn is still recorded per chat.
+        # The lookup embeds the query, so it stays off the event loop.
+        cache_ns = ticket_id or ""
+        cached = await asyncio.to_thread(
+            self._response_cache.get, user_message, cache_ns
+        )
+        if cached is not None:
+            agent_response, kb_sources, ticket_info = cached
+            self._record_turn(chat_id, user_message, agent_response)
+            return {
+                "agent_response": agent_response,
+                "kb_sources": kb_sources if include_sources else [],
+                "ticket_info": ticket_info,
+                "conversation_length": len(self.conversation_history[chat_id]),
+            }
+
+        messages, kb_results, ticket_info = await self._aprepare_turn(
+            user_message, chat_id, ticket_id
+        )
+
+        # Get response from LLM (batched across concurrent turns)
+        try:
+            response = await self._allm_invoke(messages)
+            agent_response = response.content
+            llm_ok = True
+        except Exception as e:
+            logger.error(f"Error getting LLM response: {str(e)}")
+            agent_response = "I apologize, but I encountered an error processing your request. Please try again."
+            llm_ok = False
+
+        self._record_turn(chat_id, user_message, agent_response)
+
+        # The cache always stores full sources so a later hit can serve
+        # callers that do want them; the build is skipped entirely only
+        # when neither the caller nor the cache needs it
+        kb_sources = (
+            self._format_sources(kb_results)
+            if include_sources or llm_ok
+            else []
+        )
+        if llm_ok:
+            # Never cache the error fallback
+            await asyncio.to_thread(
+                self._response_cache.put,
+                user_message,
+                (agent_response, kb_sources, ticket_info),
+                cache_ns,
+            )
+
         return {
             "agent_response": agent_response,
-            "kb_sources": kb_sources,
+            "kb_sources": kb_sources if include_sources else [],
+            "ticket_info": ticket_info,
+            "conversation_length": len(self.conversation_history[chat_id]),
+        }
+
+    async def aprocess_message_stream(
+        self, user_message: str, chat_id: str, ticket_id: Optional[str] = None
+    ):
+        """
+        Process a user message, streaming the response as it is generated.
+
+        Yields {"delta": chunk} events while tokens arrive, then a final
+        {"done": True, ...} event carrying the assembled response plus
+        sources and ticket info. History is only updated once the stream
+        completes.
+
+        Args:
+            user_message: The user's message
+            chat_id: Unique chat session ID
+            ticket_id: Optional ticket ID for context
+
+        Yields:
+            Event dictionaries as described above
+        """
+        logger.debug("Streaming message for chat %s: %s", chat_id, user_message[:100])
+
+        # Context gathering hits Chroma and the ticket store; keep it off
+        # the event loop
+        messages, kb_results, ticket_info = await asyncio.to_thread(
+            self._prepare_turn, user_message, chat_id, ticket_id
+        )
+
+        parts = []
+        try:
+            async for chunk in self.llm.astream(messages):
+                if chunk.content:
+                    parts.append(chunk.content)
+                    yield {"delta": chunk.content}
+        except Exception as e:
+            logger.error(f"Error streaming LLM response: {str(e)}")
+            fallback = "I apologize, but I encountered an error processing your request. Please try again."
+            parts = [fallback]
+            yield {"delta": fallback}
+
+        agent_response = "".join(parts)
+        self._record_turn(chat_id, user_message, agent_response)
+
+        yield {
+            "done": True,
+            "agent_response": agent_response,
+            "kb_sources": self._format_sources(kb_results),
             "ticket_info": ticket_info,
             "conversation_length": len(self.conversation_history[chat_id]),
         }
@@ -238,8 +599,9 @@ The customer may reference a ticket ID. Use this to provide personalized support
         """
         history = []
         if chat_id in self.conversation_history:
-            for role, content in self.conversation_history[chat_id]:
-                history.append({"role": role, "message": content})
+            for msg in self.conversation_history[chat_id]:
+                role = "user" if isinstance(msg, HumanMessage) else "assistant"
+                history.append({"role": role, "message": msg.content})
         return history
 
     def clear_chat_history(self, chat_id: str) -> bool:
@@ -1,11 +1,37 @@
 # ticket_system.py
 import logging
+import re
+from collections import ChainMap, defaultdict
 from typing import Optional, List, Dict
 from datetime import datetime
 import uuid
 
 logger = logging.getLogger(__name__)
 
+# Optional: pyahocorasick matches many patterns in one DFA pass; used to
+# resolve partial-word searches against the index vocabulary
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Word tokens for the inverted search index
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Summary template shared by every render: format_map applies it in one
+# C-level call straight from the ticket dict
+_SUMMARY_TMPL = (
+    "Ticket ID: {ticket_id}\n"
+    "Title: {title}\n"
+    "Status: {status}\n"
+    "Priority: {priority}\n"
+    "Category: {category}\n"
+    "Customer: {customer_name}\n"
+    "Created: {created_date}\n"
+    "Description: {description}\n"
+    "Assigned To: {assigned_to}"
+)
+
 # Mock ticket database
 TICKETS_DB = {
     "TICKET-001": {
@@ -48,8 +74,50 @@ class TicketSystem:
     
     def __init__(self):
         """Initialize ticket system."""
-        self.tickets = TICKETS_DB.copy()
+        # Copy-on-write view over the seed data: reads hit TICKETS_DB
+        # directly, and only tickets actually mutated get copied into
+        # the overrides layer — instantiation allocates nothing per seed
+        # ticket and never mutates the shared module-level dicts
+        self._overrides: Dict[str, Dict] = {}
+        self.tickets = ChainMap(self._overrides, TICKETS_DB)
+
+        # Secondary indexes: customer lookups and text search would
+        # otherwise scan and lowercase every ticket on every call
+        self._by_customer: Dict[str, List[Dict]] = defaultdict(list)
+        self._search_blob: Dict[str, str] = {}
+        self._postings: Dict[str, set] = defaultdict(set)
+
+        # Memoized summary strings, invalidated on writes; kept out of
+        # the ticket dicts so serialized tickets stay clean
+        self._summary_cache: Dict[str, str] = {}
+
+        for ticket in self.tickets.values():
+            self._index_ticket(ticket)
+            self._summary_cache[ticket["ticket_id"]] = self._render_summary(ticket)
+
         logger.info("Ticket System initialized")
+
+    def _own(self, ticket_id: str) -> Dict:
+        """Get a privately-owned copy of a ticket, for mutation."""
+        ticket = self._overrides.get(ticket_id)
+        if ticket is None:
+            ticket = self._overrides[ticket_id] = dict(TICKETS_DB[ticket_id])
+            # Repoint the customer index at the owned copy so lookups
+            # see subsequent mutations
+            indexed = self._by_customer[ticket["customer_name"].lower()]
+            for i, entry in enumerate(indexed):
+                if entry["ticket_id"] == ticket_id:
+                    indexed[i] = ticket
+                    break
+        return ticket
+
+    def _index_ticket(self, ticket: Dict) -> None:
+        """Add a ticket to the customer and search indexes."""
+        self._by_customer[ticket["customer_name"].lower()].append(ticket)
+        blob = (ticket["title"] + " " + ticket["description"]).lower()
+        self._search_blob[ticket["ticket_id"]] = blob
+        for token in set(_TOKEN_RE.findall(blob)):
+            self._postings[token].add(ticket["ticket_id"])
     
     def get_ticket(self, ticket_id: str) -> Optional[Dict]:
         """
@@ -63,9 +131,9 @@ class TicketSystem:
         """
         ticket = self.tickets.get(ticket_id)
         if ticket:
-            logger.info(f"Retrieved ticket: {ticket_id}")
+            logger.debug("Retrieved ticket: %s", ticket_id)
         else:
-            logger.warning(f"Ticket not found: {ticket_id}")
+            logger.warning("Ticket not found: %s", ticket_id)
         return ticket
     
     def create_ticket(self, customer_name: str, title: str, description: str, 
@@ -98,6 +166,8 @@ class TicketSystem:
         }
         
         self.tickets[ticket_id] = ticket
+        self._index_ticket(ticket)
+        self._summary_cache[ticket_id] = self._render_summary(ticket)
         logger.info(f"Created new ticket: {ticket_id}")
         return ticket_id
     
@@ -113,7 +183,8 @@ class TicketSystem:
             True if successful, False otherwise
         """
         if ticket_id in self.tickets:
-            self.tickets[ticket_id]["status"] = status
+            self._own(ticket_id)["status"] = status
+            self._summary_cache.pop(ticket_id, None)
             logger.info(f"Updated ticket {ticket_id} status to {status}")
             return True
         return False
@@ -128,9 +199,8 @@ class TicketSystem:
         Returns:
             List of tickets for the customer
         """
-        tickets = [t for t in self.tickets.values() 
-                  if t["customer_name"].lower() == customer_name.lower()]
-        logger.info(f"Found {len(tickets)} tickets for customer: {customer_name}")
+        tickets = list(self._by_customer.get(customer_name.lower(), ()))
+        logger.debug("Found %d tickets for customer: %s", len(tickets), customer_name)
         return tickets
     
     def get_open_tickets(self) -> List[Dict]:
@@ -150,13 +220,15 @@ class TicketSystem:
             True if successful, False otherwise
         """
         if ticket_id in self.tickets:
-            if "notes" not in self.tickets[ticket_id]:
-                self.tickets[ticket_id]["notes"] = []
-            
-            self.tickets[ticket_id]["notes"].append({
+            ticket = self._own(ticket_id)
+            if "notes" not in ticket:
+                ticket["notes"] = []
+
+            ticket["notes"].append({
                 "timestamp": datetime.now().isoformat(),
                 "text": note
             })
+            self._summary_cache.pop(ticket_id, None)
             logger.info(f"Added note to ticket {ticket_id}")
             return True
         return False
@@ -172,32 +244,99 @@ class TicketSystem:
             List of matching tickets
         """
         query_lower = query.lower()
+
+        # Narrow via the inverted index when every query word is a known
+        # token: intersecting posting sets is sub-linear in the corpus.
+        tokens = _TOKEN_RE.findall(query_lower)
+        if not tokens:
+            candidates = self._search_blob.keys()
+        elif all(t in self._postings for t in tokens):
+            candidates = set.intersection(*(self._postings[t] for t in tokens))
+        else:
+            # Partial words ("bill" matching "billing"): map each unknown
+            # word to the vocabulary tokens containing it, then intersect
+            # the unioned postings. Any blob containing the query verbatim
+            # contains every query word inside one of its tokens, so this
+            # stays a superset of the true matches — the substring check
+            # below keeps the semantics exact.
+            vocab_hits = self._match_vocab(
+                [t for t in tokens if t not in self._postings]
+            )
+            candidates = None
+            for token in tokens:
+                ids = self._postings.get(token)
+                if ids is None:
+                    ids = set()
+                    for vocab_token in vocab_hits.get(token, ()):
+                        ids |= self._postings[vocab_token]
+                candidates = set(ids) if candidates is None else candidates & ids
+                if not candidates:
+                    break
+
+        # Substring-verify only the (usually tiny) candidate set, with
+        # one .lower() on the query instead of two per ticket per call
         results = [
-            t for t in self.tickets.values()
-            if query_lower in t["title"].lower() or 
-               query_lower in t["description"].lower()
+            self.tickets[ticket_id]
+            for ticket_id in candidates
+            if query_lower in self._search_blob[ticket_id]
         ]
-        logger.info(f"Found {len(results)} tickets matching query: {query}")
+        logger.debug("Found %d tickets matching query: %s", len(results), query)
         return results
     
+    def _render_summary(self, ticket: Dict) -> str:
+        """Build a ticket's summary string (uncached)."""
+        return _SUMMARY_TMPL.format_map(ticket)
+
+    def format_ticket_summary(self, ticket: Dict) -> str:
+        """
+        Format a summary from an already-fetched ticket dict.
+
+        Summaries are memoized per ticket and invalidated by status
+        updates and notes, so repeated references in a chat session
+        reuse one formatted string.
+        """
+        ticket_id = ticket["ticket_id"]
+        summary = self._summary_cache.get(ticket_id)
+        if summary is None:
+            summary = self._summary_cache[ticket_id] = self._render_summary(ticket)
+        return summary
+
+    def _match_vocab(self, partial_tokens: List[str]) -> Dict[str, set]:
+        """
+        Map each partial query token to vocabulary tokens containing it.
+
+        With pyahocorasick installed, all partials are matched against
+        each vocabulary token in a single automaton pass; otherwise a
+        plain substring scan over the (small) vocabulary is used.
+
+        Args:
+            partial_tokens: Query words absent from the token index
+
+        Returns:
+            Dict of partial token -> set of matching vocabulary tokens
+        """
+        hits: Dict[str, set] = defaultdict(set)
+        if ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for token in partial_tokens:
+                automaton.add_word(token, token)
+            automaton.make_automaton()
+            for vocab_token in self._postings:
+                for _end, token in automaton.iter(vocab_token):
+                    hits[token].add(vocab_token)
+        else:
+            for vocab_token in self._postings:
+                for token in partial_tokens:
+                    if token in vocab_token:
+                        hits[token].add(vocab_token)
+        return hits
+
     def get_ticket_summary(self, ticket_id: str) -> str:
         """Get a formatted summary of a ticket."""
         ticket = self.get_ticket(ticket_id)
         if not ticket:
             return f"Ticket {ticket_id} not found"
-        
-        summary = f"""
-Ticket ID: {ticket['ticket_id']}
-Title: {ticket['title']}
-Status: {ticket['status']}
-Priority: {ticket['priority']}
-Category: {ticket['category']}
-Customer: {ticket['customer_name']}
-Created: {ticket['created_date']}
-Description: {ticket['description']}
-Assigned To: {ticket['assigned_to']}
-"""
-        return summary.strip()
+        return self.format_ticket_summary(ticket)
     
     def get_all_tickets(self) -> List[Dict]:
         """Get all tickets."""